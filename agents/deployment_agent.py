@@ -4,10 +4,13 @@ It uses tools and a ReAct agent to decide how to deploy and to handle missing/in
 Supports both resource group and subscription-scope deployments.
 """
 
+import asyncio
 import logging
+import functools
 import json
 from datetime import datetime
-from langgraph.prebuilt import create_react_agent
+from typing import Annotated
+from langgraph.prebuilt import create_react_agent, InjectedState
 from state import ARMAState
 from langgraph.types import interrupt
 from factory import (
@@ -17,11 +20,8 @@ from factory import (
 from langchain_core.tools import tool
 from prompts import DEPLOYMENT_SYSTEM_PROMPT
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 # --- Tool 1: Deploy at Resource Group Scope ---
 """
@@ -29,19 +29,21 @@ This tool deploys the ARM template to a resource group (resourceGroup scope).
 It uses the Azure SDK to deploy the template.
 """
 @tool
-def deploy_resource_group_scope_tool(subscription_id=None, resource_group_name=None, template=None, parameter_file_content=None, location=None, messages=None, **kwargs):
+async def deploy_resource_group_scope_tool(state: Annotated[dict, InjectedState], subscription_id=None, resource_group_name=None, parameter_file_content=None, location=None, messages=None, **kwargs):
     """
     Deploys the ARM template to a resource group (resourceGroup scope).
+    The template is read from the graph state, not from the model's arguments.
     
     Args:
+        state (dict): The graph state, injected by the tool node.
         subscription_id (str): The subscription ID.
         resource_group_name (str): The resource group name.
-        template (dict): The ARM template.
         parameter_file_content (dict): The parameter file content.
         location (str): The location.
         messages (list): The list of messages to pass to the LLM.
         **kwargs: Additional keyword arguments.
     """
+    template = state.get("template")
     parameters = (parameter_file_content or {}).get("parameters", {})
     if not (subscription_id and resource_group_name and template and parameters):
         return {
@@ -57,7 +59,9 @@ def deploy_resource_group_scope_tool(subscription_id=None, resource_group_name=N
         if isinstance(t, str):
             t = json.loads(t)
         logger.info(f"Deploying template to resource group {resource_group_name} in subscription {subscription_id}")
-        poller = client.deployments.begin_create_or_update(
+        # The SDK client is synchronous: both the initial request and the long-running poll run in a worker thread
+        poller = await asyncio.to_thread(
+            client.deployments.begin_create_or_update,
             resource_group_name,
             deployment_name,
             {
@@ -68,7 +72,7 @@ def deploy_resource_group_scope_tool(subscription_id=None, resource_group_name=N
                 }
             }
         )
-        result = poller.result()
+        result = await asyncio.to_thread(poller.result)
         return {
             **kwargs,
             "messages": (messages or []) + [{"role": "system", "content": "Resource group deployment succeeded."}],
@@ -91,18 +95,20 @@ This tool deploys the ARM template at the subscription scope (subscription scope
 It uses the Azure SDK to deploy the template.
 """
 @tool
-def deploy_subscription_scope_tool(subscription_id=None, template=None, parameter_file_content=None, location=None, messages=None, **kwargs):
+async def deploy_subscription_scope_tool(state: Annotated[dict, InjectedState], subscription_id=None, parameter_file_content=None, location=None, messages=None, **kwargs):
     """
     Deploys the ARM template at the subscription scope (subscription scope).
+    The template is read from the graph state, not from the model's arguments.
     
     Args:
+        state (dict): The graph state, injected by the tool node.
         subscription_id (str): The subscription ID.
-        template (dict): The ARM template.
         parameter_file_content (dict): The parameter file content.
         location (str): The location.
         messages (list): The list of messages to pass to the LLM.
         **kwargs: Additional keyword arguments.
     """
+    template = state.get("template")
     parameters = (parameter_file_content or {}).get("parameters", {})
     if not (subscription_id and template and parameters and location):
         return {
@@ -118,7 +124,8 @@ def deploy_subscription_scope_tool(subscription_id=None, template=None, paramete
         if isinstance(t, str):
             t = json.loads(t)
         logger.info(f"Deploying template at subscription scope in subscription {subscription_id}, location {location}")
-        poller = client.deployments.begin_create_or_update_at_subscription_scope(
+        poller = await asyncio.to_thread(
+            client.deployments.begin_create_or_update_at_subscription_scope,
             deployment_name,
             {
                 "location": location,
@@ -129,7 +136,7 @@ def deploy_subscription_scope_tool(subscription_id=None, template=None, paramete
                 }
             }
         )
-        result = poller.result()
+        result = await asyncio.to_thread(poller.result)
         return {
             **kwargs,
             "messages": (messages or []) + [{"role": "system", "content": "Subscription scope deployment succeeded."}],
@@ -164,12 +171,14 @@ def prompt_for_missing_deploy_tool(deployment_error=None, messages=None, **kwarg
     msg = deployment_error or "Missing or invalid fields for deployment."
     updated_messages = list(messages) if messages else []
     updated_messages.append({"role": "system", "content": msg})
-    raise interrupt(msg)
+    # the user's answer (passed with Command(resume=...)) becomes the tool result
+    return interrupt(msg)
 
 class DeploymentAgent:
     @staticmethod
+    @functools.cache
     def build():
-        llm = LLMFactory.get_llm()
+        llm = LLMFactory.get_llm(tier="large")
         tools = [
             deploy_resource_group_scope_tool,
             deploy_subscription_scope_tool,
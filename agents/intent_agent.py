@@ -1,151 +1,264 @@
 """
 This agent is responsible for detecting the intent of the user's query and extracting the necessary information.
 It also determines the scope of the query and checks for required scope fields.
+
+Extraction is a single structured-output LLM call; template fetch, scope field checks and scope
+determination are plain Python nodes in the same subgraph.
 """
 
 import logging
-from typing import Dict, Any
-from langgraph.prebuilt import create_react_agent
-from langgraph.types import interrupt
-from state import ARMAState
+import functools
+import glob
+import hashlib
+from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import interrupt, CachePolicy
+from langgraph.cache.memory import InMemoryCache
+from state import IntentState
 import os
 from dotenv import load_dotenv
 from factory import (
     LLMFactory,
+    INTERNAL_LLM_TAG,
     config
 )
-from prompts import INTENT_EXTRACTION_SYSTEM_PROMPT
+from prompts import render_intent_system_prompt
 import json
-from langchain_core.tools import tool
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
 # load environment variables
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+@functools.lru_cache(maxsize=64)
+def load_template(template_path: str) -> dict:
+    """
+    Loads and parses an ARM template from disk. Results are cached per path, so the returned
+    dict is shared and must be treated as read-only.
+
+    Args:
+        template_path (str): The path of the template under quickstarts/.
+
+    Returns:
+        dict: The ARM template.
+    """
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template file not found: {template_path}")
+    with open(template_path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-# --- Tool 1: Intent Extraction ---
+def preload_templates(user_prompt: str) -> list:
+    """
+    Speculatively loads the quickstart templates whose resource name appears in the user's prompt
+    (e.g. "storage account" -> quickstarts/microsoft.storage/storageaccounts.json) so that
+    fetch_template_tool hits the cache once the intent has been extracted. Runs without an LLM,
+    so it can be started concurrently with intent detection; a wrong guess only costs a file read.
+
+    Args:
+        user_prompt (str): The user's raw request.
+
+    Returns:
+        list: The template paths that were preloaded.
+    """
+    normalized = "".join(c for c in user_prompt.lower() if c.isalnum())
+    preloaded = []
+    for template_path in glob.glob("quickstarts/*/*.json"):
+        resource = os.path.splitext(os.path.basename(template_path))[0]
+        if resource.rstrip("s") in normalized:
+            try:
+                load_template(template_path)
+                preloaded.append(template_path)
+            except Exception as e:
+                logger.warning(f"Failed to preload template {template_path}: {e}")
+    return preloaded
+
+class IntentExtraction(BaseModel):
+    """Structured output of the intent extraction LLM call."""
+    intent: Optional[str] = Field(default=None, description="The high-level action: create, delete, update, get or list.")
+    resource_type: Optional[str] = Field(default=None, description="The full Azure resource type, e.g. Microsoft.Storage/storageAccounts.")
+    provided_fields: Dict[str, Any] = Field(default_factory=dict, description="Parameter values the user provided.")
+    resource_group_name: Optional[str] = None
+    subscription_id: Optional[str] = None
+    subscription_name: Optional[str] = None
+    location: Optional[str] = None
+
+def _last_user_message(messages) -> str:
+    """Returns the content of the latest user message."""
+    for message in reversed(messages or []):
+        if isinstance(message, HumanMessage):
+            return message.content
+        if isinstance(message, dict) and message.get("role") == "user":
+            return message.get("content", "")
+    return ""
+
+# --- Node 1: Intent Extraction ---
 """
-This tool extracts intent, resource_type, provided_fields, resource_group_name, subscription_id, subscription_name, and location from the user's prompt using the LLM.
+This node extracts intent, resource_type, provided_fields, resource_group_name, subscription_id, subscription_name, and location
+from the user's prompt with a single structured-output LLM call.
 """
-@tool
-def extract_intent_tool(messages, **kwargs):
+def make_intent_extraction_node(llm):
     """
-    Extracts intent, resource_type, provided_fields, resource_group_name, subscription_id, subscription_name, and location from the user's prompt using the LLM.
-    
+    Builds the intent extraction node around an LLM bound to the IntentExtraction schema.
+
     Args:
-        messages (list): The list of messages to pass to the LLM.
-        **kwargs: Additional keyword arguments.
+        llm: A LangChain chat model.
 
     Returns:
-        dict: The intent, resource_type, provided_fields, resource_group_name, subscription_id, subscription_name, and location.
+        The async node function.
     """
-    llm = LLMFactory.get_llm()
-    system_prompt = INTENT_EXTRACTION_SYSTEM_PROMPT
-    user_message = messages[-1]["content"] if isinstance(messages[-1], dict) else getattr(messages[-1], "content", "")
-    
-    # use human message as user message
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_message)
-    ])
-    try:
-        result = json.loads(response.content)
-    except Exception:
-        result = {}
-    logger.info(f"LLM intent extraction result: {result}")
-    updated_messages = list(messages)
-    updated_messages.append({
-        "role": "assistant",
-        "content": response.content
-    })
+    structured_llm = llm.with_structured_output(IntentExtraction, method="json_mode").with_config(tags=[INTERNAL_LLM_TAG])
+
+    async def intent_extraction(state: IntentState) -> Dict[str, Any]:
+        """
+        Extracts intent, resource_type, provided_fields, resource_group_name, subscription_id, subscription_name, and location from the user's prompt.
+
+        Args:
+            state (IntentState): The current state.
+
+        Returns:
+            dict: The state update.
+        """
+        user_message = _last_user_message(state.get("messages"))
+        try:
+            # instructions and examples go in the system message so they form a stable prefix ahead of the request
+            result = await structured_llm.ainvoke([
+                SystemMessage(content=render_intent_system_prompt(user_message)),
+                HumanMessage(content=user_message)
+            ])
+        except Exception as e:
+            # Let the failure (e.g. an auth or quota error) reach the caller instead of asking the user for fields
+            logger.error(f"Intent extraction failed: {e}")
+            raise
+        logger.info(f"LLM intent extraction result: {result}")
+        return {
+            "messages": [AIMessage(content=result.model_dump_json(exclude_none=True), name="intent_agent")],
+            "prompt": user_message,
+            "intent": result.intent,
+            "resource_type": result.resource_type,
+            "provided_fields": result.provided_fields,
+            "resource_group_name": result.resource_group_name,
+            "subscription_id": result.subscription_id,
+            "subscription_name": result.subscription_name,
+            "location": result.location
+        }
+
+    return intent_extraction
+
+# --- Node 2: Scope Fields Check ---
+"""
+This node checks for required scope fields and interrupts if missing.
+"""
+def scope_fields_check(state: IntentState):
+    """
+    Checks for required scope fields and interrupts if missing.
+    - resource_group_name must be present
+    - Either subscription_id (GUID) or subscription_name (string) must be present
+    If missing, interrupts and prompts the user for the missing fields. The user's answer is appended
+    to the original request and the extraction is run again.
+
+    Args:
+        state (IntentState): The current state.
+    """
+    resource_group_name = state.get("resource_group_name")
+    subscription_id = state.get("subscription_id")
+    subscription_name = state.get("subscription_name")
+    missing = []
+
+    # Check if subscription_id is present in .env
+    if not subscription_id:
+        subscription_id = config.AZURE_SUBSCRIPTION_ID or None
+
+    if not resource_group_name:
+        missing.append("resource_group_name")
+    if not (subscription_id or subscription_name):
+        missing.append("subscription_id or subscription_name")
+    if missing:
+        message = f"Please provide the following required fields: {', '.join(missing)}."
+        logger.info(f"Interrupting for missing fields: {missing}")
+        answer = interrupt(message)
+        return {
+            "missing_scope_fields": missing,
+            "missing_scope_message": message,
+            "messages": [HumanMessage(content=f"{state.get('prompt', '')}\n{answer}")]
+        }
+    logger.info("All required scope fields are present.")
     return {
-        **kwargs,
-        "messages": updated_messages,
-        "intent": result.get("intent"),
-        "resource_type": result.get("resource_type"),
-        "provided_fields": result.get("provided_fields", {}),
-        "resource_group_name": result.get("resource_group_name"),
-        "subscription_id": result.get("subscription_id"),
-        "subscription_name": result.get("subscription_name"),
-        "location": result.get("location"),
-        "user_query": user_message
+        "subscription_id": subscription_id,
+        "missing_scope_fields": [],
+        "missing_scope_message": None
     }
 
-# --- Tool 2: Template Fetch ---
+# Routing after the scope fields check: intent -> next node. Only create/update requests need an ARM template.
+INTENT_ROUTES = {
+    "retry": "intent_extraction",
+    "create": "template_fetch",
+    "update": "template_fetch",
+    "delete": END,
+    "get": END,
+    "list": END,
+    "other": END,
+}
+
+def route_after_scope_fields_check(state: IntentState) -> str:
+    """Returns the INTENT_ROUTES key: re-run the extraction with the user's answer to a missing-fields prompt, else route on intent."""
+    if state.get("missing_scope_fields"):
+        return "retry"
+    intent = state.get("intent")
+    return intent if intent in INTENT_ROUTES else "other"
+
+# --- Node 3: Template Fetch ---
 """
-This tool loads the ARM template from a local file path based on the resource_type.
+This node loads the ARM template from a local file path based on the resource_type.
 """
-@tool
-def fetch_template_tool(resource_type=None, messages=None, **kwargs):
+def template_fetch(state: IntentState) -> Dict[str, Any]:
     """
     Loads the ARM template from a local file path based on the resource_type.
-    
+
     Args:
-        resource_type (str): The resource type to fetch the template for.
-        messages (list): The list of messages to pass to the LLM.
-        **kwargs: Additional keyword arguments.
+        state (IntentState): The current state.
 
     Returns:
-        dict: The ARM template.
+        dict: The state update with the ARM template.
     """
+    resource_type = state.get("resource_type")
     logger.info(f"Loading template for resource_type: {resource_type}")
     template = {}
     template_path = ""
-    template_error = None
     if resource_type:
         try:
             namespace, resource = resource_type.split("/", 1)
             template_path = f"quickstarts/{namespace.lower()}/{resource.lower()}.json"
             logger.info(f"Template path: {template_path}")
-            if not os.path.exists(template_path):
-                raise FileNotFoundError(f"Template file not found: {template_path}")
-            with open(template_path, "r", encoding="utf-8") as f:
-                template = json.load(f)
+            template = load_template(template_path)
             logger.info(f"Loaded template from {template_path}")
-            logger.info(f"Template loaded in fetch_template_tool: {template} (type: {type(template)})")
-        except Exception as e:
-            logger.exception("template_fetch_tool failed")
-            template_error = str(e)
-    else:
-        template_error = "No resource_type provided."
-    updated_messages = list(messages) if messages else []
-    updated_messages.append({
-        "role": "system",
-        "content": f"Template fetch: {template_path or 'not found'}"
-    })
+        except Exception:
+            logger.exception("template_fetch failed")
+            template_path = ""
     return {
-        **kwargs,
-        "messages": updated_messages,
         "template": template,
-        "template_path": template_path,
-        "template_error": template_error
+        "messages": [AIMessage(content=f"Template fetch: {template_path or 'not found'}", name="intent_agent")]
     }
 
-# --- Tool 3: Scope Determination ---
+# --- Node 4: Scope Determination ---
 """
-This tool determines the scope from the ARM template schema. Supports subscription and resourceGroups only.
+This node determines the scope from the ARM template schema. Supports subscription and resourceGroups only.
 """
-@tool
-def determine_scope_tool(template=None, messages=None, **kwargs):
+def scope_determination(state: IntentState) -> Dict[str, Any]:
     """
     Determines the scope from the ARM template schema. Supports subscription and resourceGroups only.
-    
+
     Args:
-        template (dict): The ARM template.
-        messages (list): The list of messages to pass to the LLM.
-        **kwargs: Additional keyword arguments.
+        state (IntentState): The current state.
 
     Returns:
-        dict: The scope.
+        dict: The state update with the scope.
     """
     scope = None
     try:
-        t = template
+        t = state.get("template")
         if isinstance(t, str):
             t = json.loads(t)
         if t and "$schema" in t:
@@ -155,85 +268,34 @@ def determine_scope_tool(template=None, messages=None, **kwargs):
             else:
                 scope = "resourceGroup"
     except Exception as e:
-        logger.error(f"determine_scope_tool failed: {e}")
+        logger.error(f"scope_determination failed: {e}")
     logger.info(f"Determined scope: {scope}")
-    updated_messages = list(messages) if messages else []
-    updated_messages.append({
-        "role": "system",
-        "content": f"Scope determined: {scope}"
-    })
     return {
-        **kwargs,
-        "messages": updated_messages,
-        "scope": scope
+        "scope": scope,
+        "messages": [AIMessage(content=f"Scope determined: {scope}", name="intent_agent")]
     }
 
-# --- Tool 4: Scope Fields Check ---
-"""
-This tool checks for required scope fields and interrupts if missing.
-"""
-@tool
-def check_scope_fields_tool(resource_group_name=None, subscription_id=None, subscription_name=None, messages=None, **kwargs):
-    """
-    Checks for required scope fields and interrupts if missing.
-    - resource_group_name must be present
-    - Either subscription_id (GUID) or subscription_name (string) must be present
-    If missing, interrupts and prompts the user for the missing fields.
-    
-    Args:
-        resource_group_name (str): The resource group name.
-        subscription_id (str): The subscription ID.
-        subscription_name (str): The subscription name.
-        messages (list): The list of messages to pass to the LLM.
-        **kwargs: Additional keyword arguments.
-    """
-    missing = []
-    
-    # Check if subscription_id is present in .env
-    if not subscription_id:
-        subscription_id = config.AZURE_SUBSCRIPTION_ID
-
-    if not resource_group_name:
-        missing.append("resource_group_name")
-    if not (subscription_id or subscription_name):
-        missing.append("subscription_id or subscription_name")
-    updated_messages = list(messages) if messages else []
-    if missing:
-        message = f"Please provide the following required fields: {', '.join(missing)}."
-        logger.info(f"Interrupting for missing fields: {missing}")
-        updated_messages.append({
-            "role": "system",
-            "content": message
-        })
-        return interrupt(message)
-    logger.info("All required scope fields are present.")
-    updated_messages.append({
-        "role": "system",
-        "content": "All required scope fields are present."
-    })
-    return {
-        **kwargs,
-        "messages": updated_messages,
-        "resource_group_name": resource_group_name,
-        "subscription_id": subscription_id,
-        "subscription_name": subscription_name
-    }
+def intent_cache_key(state: IntentState) -> str:
+    """Cache key for the intent extraction node: the extraction is a pure function of the latest user message."""
+    return hashlib.sha1(_last_user_message(state.get("messages")).encode("utf-8")).hexdigest()
 
 class IntentAgent:
     @staticmethod
+    @functools.cache
     def build():
-        llm = LLMFactory.get_llm()
-        tools = [
-            extract_intent_tool,
-            check_scope_fields_tool,
-            fetch_template_tool,
-            determine_scope_tool,
-        ]
-        agent = create_react_agent(
-            tools=tools,
-            model=llm,
-            prompt=INTENT_EXTRACTION_SYSTEM_PROMPT,
-            name="intent_agent",
-            state_schema=ARMAState
+        llm = LLMFactory.get_llm(tier="small")
+        builder = StateGraph(IntentState)
+        builder.add_node(
+            "intent_extraction",
+            make_intent_extraction_node(llm),
+            cache_policy=CachePolicy(key_func=intent_cache_key, ttl=3600)
         )
-        return agent
\ No newline at end of file
+        builder.add_node("scope_fields_check", scope_fields_check)
+        builder.add_node("template_fetch", template_fetch)
+        builder.add_node("scope_determination", scope_determination)
+        builder.add_edge(START, "intent_extraction")
+        builder.add_edge("intent_extraction", "scope_fields_check")
+        builder.add_conditional_edges("scope_fields_check", route_after_scope_fields_check, INTENT_ROUTES)
+        builder.add_edge("template_fetch", "scope_determination")
+        builder.add_edge("scope_determination", END)
+        return builder.compile(name="intent_agent", cache=InMemoryCache())
@@ -3,7 +3,9 @@ This agent is responsible for performing actions on Azure resources: get, list,
 It uses tools and a ReAct agent to decide which action to take and to handle missing/invalid fields.
 """
 
+import asyncio
 import logging
+import functools
 import json
 from langgraph.prebuilt import create_react_agent
 from state import ARMAState
@@ -15,11 +17,8 @@ from factory import (
 from langchain_core.tools import tool
 from prompts import RESOURCE_ACTION_SYSTEM_PROMPT
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 # Suppress logging for azure sdk
 logging.getLogger("azure").setLevel(logging.WARNING)
@@ -33,7 +32,7 @@ This tool gets details of the specified Azure resource.
 It uses the Azure SDK to get the resource.
 """
 @tool
-def get_resource_tool(subscription_id=None, resource_group_name=None, resource_type=None, provided_fields=None, messages=None, **kwargs):
+async def get_resource_tool(subscription_id=None, resource_group_name=None, resource_type=None, provided_fields=None, messages=None, **kwargs):
     """
     Gets details of the specified Azure resource.
     
@@ -51,11 +50,11 @@ def get_resource_tool(subscription_id=None, resource_group_name=None, resource_t
             "resource_action_error": "Missing required fields for get operation."
         }
     try:
-        client = config.get_resource_management_client(subscription_id)
         namespace, type_name = resource_type.split("/", 1)
         api_version = "2021-04-01"
         logger.info(f"Getting resource: {resource_type} name={resource_name} rg={resource_group_name} sub={subscription_id}")
-        resource = client.resources.get(
+        resource = await config.aget_resource(
+            subscription_id,
             resource_group_name=resource_group_name,
             resource_provider_namespace=namespace,
             parent_resource_path="",
@@ -85,7 +84,7 @@ def get_resource_tool(subscription_id=None, resource_group_name=None, resource_t
 This tool lists resources of the specified type in the given resource group. If resource_type is not provided, lists all resources in the resource group.
 """
 @tool
-def list_resources_tool(subscription_id=None, resource_group_name=None, resource_type=None, messages=None, **kwargs):
+async def list_resources_tool(subscription_id=None, resource_group_name=None, resource_type=None, messages=None, **kwargs):
     """
     Lists resources of the specified type in the given resource group. If resource_type is not provided, lists all resources in the resource group.
     
@@ -102,18 +101,12 @@ def list_resources_tool(subscription_id=None, resource_group_name=None, resource
             "resource_action_error": "Missing required fields for list operation."
         }
     try:
-        client = config.get_resource_management_client(subscription_id)
         if resource_type:
             namespace, type_name = resource_type.split("/", 1)
             filter_str = f"resourceType eq '{namespace}/{type_name}'"
-            resources = client.resources.list_by_resource_group(
-                resource_group_name=resource_group_name,
-                filter=filter_str
-            )
+            resources = await config.alist_resources(subscription_id, resource_group_name, filter=filter_str)
         else:
-            resources = client.resources.list_by_resource_group(
-                resource_group_name=resource_group_name
-            )
+            resources = await config.alist_resources(subscription_id, resource_group_name)
         resource_list = [r.as_dict() if hasattr(r, "as_dict") else r for r in resources]
         return {
             **kwargs,
@@ -137,7 +130,7 @@ This tool deletes the specified Azure resource.
 It uses the Azure SDK to delete the resource.
 """
 @tool
-def delete_resource_tool(subscription_id=None, resource_group_name=None, resource_type=None, provided_fields=None, messages=None, **kwargs):
+async def delete_resource_tool(subscription_id=None, resource_group_name=None, resource_type=None, provided_fields=None, messages=None, **kwargs):
     """
     Deletes the specified Azure resource.
     
@@ -159,7 +152,9 @@ def delete_resource_tool(subscription_id=None, resource_group_name=None, resourc
         namespace, type_name = resource_type.split("/", 1)
         api_version = "2021-04-01"
         logger.info(f"Deleting resource: {resource_type} name={resource_name} rg={resource_group_name} sub={subscription_id}")
-        delete_poller = client.resources.begin_delete(
+        # The SDK client is synchronous: both the initial request and the poll run in a worker thread
+        delete_poller = await asyncio.to_thread(
+            client.resources.begin_delete,
             resource_group_name=resource_group_name,
             resource_provider_namespace=namespace,
             parent_resource_path="",
@@ -167,7 +162,9 @@ def delete_resource_tool(subscription_id=None, resource_group_name=None, resourc
             resource_name=resource_name,
             api_version=api_version
         )
-        delete_result = delete_poller.result()
+        delete_result = await asyncio.to_thread(delete_poller.result)
+        # The delete may have removed a resource group, so cached existence checks are stale
+        config.invalidate_lookup_cache(subscription_id)
         if delete_result is not None:
             result_dict = delete_result.as_dict() if hasattr(delete_result, "as_dict") else delete_result
             result_msg = result_dict
@@ -207,12 +204,14 @@ def prompt_for_missing_action_tool(resource_action_error=None, messages=None, **
     msg = resource_action_error or "Missing or invalid fields for resource action."
     updated_messages = list(messages) if messages else []
     updated_messages.append({"role": "system", "content": msg})
-    raise interrupt(msg)
+    # the user's answer (passed with Command(resume=...)) becomes the tool result
+    return interrupt(msg)
 
 class ResourceActionAgent:
     @staticmethod
+    @functools.cache
     def build():
-        llm = LLMFactory.get_llm()
+        llm = LLMFactory.get_llm(tier="large")
         tools = [
             get_resource_tool,
             list_resources_tool,
@@ -4,26 +4,28 @@ It checks if the subscription and resource group exist, validates the parameters
 and prompts the user for missing parameters if any are found.
 """
 
+import asyncio
 import json
 import logging
+import functools
+from collections import OrderedDict
 from datetime import datetime
-from langgraph.prebuilt import create_react_agent
+from typing import Annotated, Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from langgraph.prebuilt import create_react_agent, InjectedState
 from state import ARMAState
 from dotenv import load_dotenv
 from langgraph.types import interrupt
 from factory import (
     LLMFactory,
+    INTERNAL_LLM_TAG,
     config
 )
 from prompts import VALIDATION_SYSTEM_PROMPT
 from langchain_core.tools import tool
 
-# logging
-logging.basicConfig(
-  level=logging.INFO,
-  format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 # Suppress logging for azure sdk
 logging.getLogger("azure").setLevel(logging.WARNING)
@@ -36,13 +38,24 @@ load_dotenv()
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 deployment_name = f"ai-validation-{timestamp}"
 
+# LLM template validation results keyed on the template parameters and the provided fields
+_TEMPLATE_VALIDATION_CACHE_SIZE = 128
+_template_validation_cache = OrderedDict()
+
+class TemplateValidation(BaseModel):
+    """Structured output of the template validation LLM call."""
+    parameter_file_content: Dict[str, Any] = Field(default_factory=dict, description="The ARM parameter file: {\"parameters\": {name: {\"value\": ...}}}.")
+    missing_parameters: List[str] = Field(default_factory=list, description="Required template parameters with no provided value and no defaultValue.")
+    extra_fields: List[str] = Field(default_factory=list, description="Provided fields that are not template parameters.")
+    validation_error: Optional[str] = Field(default=None, description="Why the provided fields are invalid, or null.")
+
 # --- Tool 1: Subscription Check ---
 """
 This tool checks if the subscription exists and is enabled.
 It now supports lookup by either subscription_id or subscription_name, and always returns both in the state.
 """
 @tool
-def check_subscription_tool(subscription_id=None, subscription_name=None, messages=None, **kwargs):
+async def check_subscription_tool(subscription_id=None, subscription_name=None, messages=None, **kwargs):
     """
     Checks if the subscription exists and is enabled. Accepts either subscription_id or subscription_name.
     If only one is provided, looks up the other. Always returns both in the state.
@@ -57,8 +70,7 @@ def check_subscription_tool(subscription_id=None, subscription_name=None, messag
     found_name = subscription_name
     mismatch = False
     try:
-        sub_client = config.get_resource_management_client()
-        for sub in sub_client.subscriptions.list():
+        for sub in await config.alist_subscriptions():
             # Normalize for comparison
             sub_id = sub.subscription_id
             sub_name = (sub.display_name or '').strip().lower()
@@ -101,7 +113,7 @@ def check_subscription_tool(subscription_id=None, subscription_name=None, messag
 This tool checks if the resource group exists in the given subscription.
 """
 @tool
-def check_resource_group_tool(resource_group_name=None, subscription_id=None, location=None, messages=None, **kwargs):
+async def check_resource_group_tool(resource_group_name=None, subscription_id=None, location=None, messages=None, **kwargs):
     """
     Checks if the resource group exists in the given subscription.
     
@@ -115,15 +127,17 @@ def check_resource_group_tool(resource_group_name=None, subscription_id=None, lo
     created = False
     try:
         if subscription_id and resource_group_name:
-            rg_client = config.get_resource_management_client(subscription_id)
-            exists = rg_client.resource_groups.check_existence(resource_group_name)
+            exists = await config.acheck_resource_group_existence(subscription_id, resource_group_name)
             
             # Lets create the resource group if it doesn't exist. Why not?
             if not exists:
-                rg_client.resource_groups.create_or_update(
+                rg_client = config.get_resource_management_client(subscription_id)
+                await asyncio.to_thread(
+                    rg_client.resource_groups.create_or_update,
                     resource_group_name,
                     {"location": location}
                 )
+                config.invalidate_lookup_cache(subscription_id)
                 exists = True
                 created = True
     except Exception as e:
@@ -145,15 +159,17 @@ def check_resource_group_tool(resource_group_name=None, subscription_id=None, lo
 This tool validates the provided fields against the template parameters using the LLM.
 """
 @tool
-def template_validation_tool(template=None, provided_fields=None, messages=None, **kwargs):
+async def template_validation_tool(state: Annotated[dict, InjectedState], messages=None, **kwargs):
     """
     Validates the provided fields against the template parameters using the LLM.
+    The template and the provided fields are read from the graph state, not from the model's arguments.
     
     Args:
-        template (dict): The ARM template.
-        provided_fields (dict): The provided fields.
+        state (dict): The graph state, injected by the tool node.
         messages (list): The list of messages to pass to the LLM.
     """
+    template = state.get("template")
+    provided_fields = state.get("provided_fields")
     if not template:
         logger.error("No template found in state for validation.")
         validation_error = "No template found."
@@ -173,26 +189,29 @@ def template_validation_tool(template=None, provided_fields=None, messages=None,
                 missing_parameters = []
                 extra_fields = []
             else:
-                llm = LLMFactory.get_llm()
-                system_prompt = VALIDATION_SYSTEM_PROMPT
-                response = llm.invoke([
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Template parameters:\n{json.dumps({'parameters': parameters}, indent=2)}"},
-                    {"role": "user", "content": f"Provided fields:\n{json.dumps(provided_fields or {}, indent=2)}"},
-                    {"role": "user", "content": "Validate the provided fields against the template parameters and return the result as described."}
-                ])
-                try:
-                    content = response.content.strip()
-                    if content.startswith('```'):
-                        lines = content.split('\n')
-                        lines = lines[1:]
-                        if lines and lines[-1].strip().startswith('```'):
-                            lines = lines[:-1]
-                        content = '\n'.join(lines).strip()
-                    result = json.loads(content)
-                except Exception:
-                    logger.error(f"Failed to parse LLM output: {response.content}")
-                    result = {"parameter_file_content": {}, "missing_parameters": [], "extra_fields": [], "validation_error": "Failed to parse LLM output."}
+                cache_key = json.dumps({"parameters": parameters, "provided_fields": provided_fields or {}}, sort_keys=True)
+                result = _template_validation_cache.get(cache_key)
+                if result is not None:
+                    _template_validation_cache.move_to_end(cache_key)
+                    logger.info("Using cached template validation result.")
+                else:
+                    # JSON mode returns a bare JSON object; the output schema in the prompt names its keys
+                    llm = LLMFactory.get_llm(tier="small").with_structured_output(TemplateValidation, method="json_mode").with_config(tags=[INTERNAL_LLM_TAG])
+                    system_prompt = VALIDATION_SYSTEM_PROMPT
+                    try:
+                        response = await llm.ainvoke([
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": f"Template parameters:\n{json.dumps({'parameters': parameters}, indent=2)}"},
+                            {"role": "user", "content": f"Provided fields:\n{json.dumps(provided_fields or {}, indent=2)}"},
+                            {"role": "user", "content": "Validate the provided fields against the template parameters and return the result as described."}
+                        ])
+                        result = response.model_dump()
+                        _template_validation_cache[cache_key] = result
+                        if len(_template_validation_cache) > _TEMPLATE_VALIDATION_CACHE_SIZE:
+                            _template_validation_cache.popitem(last=False)
+                    except Exception as e:
+                        logger.error(f"Failed to parse LLM output: {e}")
+                        result = {"parameter_file_content": {}, "missing_parameters": [], "extra_fields": [], "validation_error": "Failed to parse LLM output."}
                 logger.info(f"LLM template validation result: {result}")
                 parameter_file_content = result.get("parameter_file_content", {})
                 missing_parameters = result.get("missing_parameters", [])
@@ -246,28 +265,29 @@ def prompt_for_missing_tool(missing_parameters=None, validation_error=None, mess
         "role": "system",
         "content": user_prompt_message
     })
-    raise interrupt(user_prompt_message)
+    # the user's answer (passed with Command(resume=...)) becomes the tool result
+    return interrupt(user_prompt_message)
 
 # --- Tool 5a: ARM Template Deployment Validation (Resource Group Scope) ---
 """
 This tool validates the ARM template and parameters against Azure at the resource group scope (without deploying).
 """
 @tool
-def arm_validation_resource_group_tool(template=None, parameter_file_content=None, resource_group_name=None, subscription_id=None, location=None, scope=None, messages=None, **kwargs):
+async def arm_validation_resource_group_tool(state: Annotated[dict, InjectedState], parameter_file_content=None, resource_group_name=None, subscription_id=None, location=None, messages=None, **kwargs):
     """
     Validates the ARM template and parameters against Azure at the resource group scope (without deploying).
-    Stores the validation result and any errors in the state.
+    Stores the validation result and any errors in the state. The template is read from the graph state.
     
     Args:
-        template (dict): The ARM template.
+        state (dict): The graph state, injected by the tool node.
         parameter_file_content (dict): The parameter file content.
         resource_group_name (str): The resource group name.
         subscription_id (str): The subscription ID.
         location (str): The location.
-        scope (str): The scope.
         messages (list): The list of messages to pass to the LLM.
         **kwargs: Additional keyword arguments.
     """
+    template = state.get("template")
     logger.info(f"[arm_validation_resource_group_tool] Template: {template}")
     validation_result = None
     validation_error = None
@@ -283,7 +303,9 @@ def arm_validation_resource_group_tool(template=None, parameter_file_content=Non
         if not resource_group_name:
             validation_error = "No resource group specified for validation."
         else:
-            poller = client.deployments.begin_validate(
+            # The SDK client is synchronous: both the initial request and the poll run in a worker thread
+            poller = await asyncio.to_thread(
+                client.deployments.begin_validate,
                 resource_group_name,
                 deployment_name,
                 {
@@ -294,7 +316,7 @@ def arm_validation_resource_group_tool(template=None, parameter_file_content=Non
                     }
                 }
             )
-            result = poller.result()
+            result = await asyncio.to_thread(poller.result)
             validation_result = result.as_dict() if hasattr(result, "as_dict") else result
             validation_error = None
             validation_status = "success"
@@ -322,20 +344,20 @@ def arm_validation_resource_group_tool(template=None, parameter_file_content=Non
 This tool validates the ARM template and parameters against Azure at the subscription scope (without deploying).
 """
 @tool
-def arm_validation_subscription_tool(template=None, parameter_file_content=None, subscription_id=None, location=None, scope=None, messages=None, **kwargs):
+async def arm_validation_subscription_tool(state: Annotated[dict, InjectedState], parameter_file_content=None, subscription_id=None, location=None, messages=None, **kwargs):
     """
     Validates the ARM template and parameters against Azure at the subscription scope (without deploying).
-    Stores the validation result and any errors in the state.
+    Stores the validation result and any errors in the state. The template is read from the graph state.
     
     Args:
-        template (dict): The ARM template.
+        state (dict): The graph state, injected by the tool node.
         parameter_file_content (dict): The parameter file content.
         subscription_id (str): The subscription ID.
         location (str): The location.
-        scope (str): The scope.
         messages (list): The list of messages to pass to the LLM.
         **kwargs: Additional keyword arguments.
     """
+    template = state.get("template")
     logger.info(f"[arm_validation_subscription_tool] Template: {template}")
     validation_result = None
     validation_error = None
@@ -348,7 +370,8 @@ def arm_validation_subscription_tool(template=None, parameter_file_content=None,
             raise ValueError("Template missing $schema property")
         parameters = (parameter_file_content or {}).get("parameters", {})
         client = config.get_resource_management_client(subscription_id)
-        poller = client.deployments.begin_validate_at_subscription_scope(
+        poller = await asyncio.to_thread(
+            client.deployments.begin_validate_at_subscription_scope,
             deployment_name,
             {
                 "location": location or "eastus",
@@ -359,7 +382,7 @@ def arm_validation_subscription_tool(template=None, parameter_file_content=None,
                 }
             }
         )
-        result = poller.result()
+        result = await asyncio.to_thread(poller.result)
         validation_result = result.as_dict() if hasattr(result, "as_dict") else result
         validation_error = None
         validation_status = "success"
@@ -384,8 +407,9 @@ def arm_validation_subscription_tool(template=None, parameter_file_content=None,
 
 class ValidationAgent:
     @staticmethod
+    @functools.cache
     def build():
-        llm = LLMFactory.get_llm()
+        llm = LLMFactory.get_llm(tier="small")
         tools = [
             check_subscription_tool,
             check_resource_group_tool,
@@ -399,6 +423,9 @@ class ValidationAgent:
             model=llm,
             state_schema=ARMAState,
             prompt=VALIDATION_SYSTEM_PROMPT,
-            name="validation_agent"
+            name="validation_agent",
+            # v2 runs each tool call as its own Send task, so the results of tool calls that completed are
+            # kept when another call in the same turn interrupts (prompt_for_missing_tool) and is resumed
+            version="v2"
         )
         return agent
\ No newline at end of file
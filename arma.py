@@ -2,34 +2,51 @@
 This file contains the ARMA workflow and the agents that make up the ARMA workflow, now wrapped in a class for extensibility and clarity.
 """
 
+import os
+import sys
 import uuid
+import queue
+import asyncio
 import logging
-from typing import List, Optional, Any
+import functools
+import threading
+from typing import List, Optional, Any, AsyncIterator
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph_supervisor import create_supervisor
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.store.memory import InMemoryStore
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import Command
 from agents import (
   IntentAgent,
   ValidationAgent,
   ResourceActionAgent,
   DeploymentAgent
 )
+from factory import config, INTERNAL_LLM_TAG
 from factory.llm_factory import LLMFactory
 from prompts import ARMA_SUPERVISOR_PROMPT
 from state import ARMAState
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 class ARMAAgent:
     """
     Encapsulates the ARMA workflow, including agent, LLM, prompt, state, store, and checkpoint initialization.
     Provides a method to compile and return the workflow.
     """
+    __slots__ = (
+        "supervisor_name",
+        "output_mode",
+        "store",
+        "checkpoint",
+        "agents",
+        "model",
+        "prompt",
+        "state_schema",
+    )
+
     def __init__(
         self,
         agents: Optional[List[Any]] = None,
@@ -54,7 +71,10 @@ class ARMAAgent:
         self.state_schema = state_schema or self._init_state_schema()
 
     def _init_agents(self) -> List[Any]:
-        """Initialize and return the default list of agents."""
+        """
+        Initialize and return the default list of agents.
+        Each agent's build() is memoized, so every supervisor in the process shares the same compiled sub-agents.
+        """
         return [
             IntentAgent.build(),
             ValidationAgent.build(),
@@ -103,29 +123,225 @@ class ARMAAgent:
             logger.error(f"Failed to create or compile ARMA agent: {e}")
             raise
 
-# Example usage:
-# agent = ARMAAgent()
-# arma = agent.build()
-
-# while True:
-#     if __name__ == "__main__":
-#         graph = invoke_arma()
-#         # get user input from command line and exit if "exit"
-#         cmd = input("Enter your request (or 'exit' to quit): ")
-#         if cmd == "exit":
-#             print("Exiting...")
-#             break
-#         user_input = ({"messages": cmd})
-#         print(f"User input: {user_input}")
-
-#     config = RunnableConfig(configurable={"thread_id": 1}, session_id=1, user_id=1)
-#     try:
-#         messages = graph.invoke(user_input, config=config)
-#         for message in messages["messages"]:
-#             message.pretty_print()
-#     except Exception as e:
-#         print(f"Workflow failed: {e}")
+class AgentPool:
+    """
+    A pre-build cache of compiled ARMA agents, so that a new chat session does not pay for building the
+    supervisor, the sub-agents and their LLM clients on its first request.
+    Agents are handed out once and never returned (each one keeps its session's checkpoints); the cache
+    is topped back up to its size by a background thread whenever an agent is handed out.
+    """
+    __slots__ = ("_factory", "_agents", "_refill_lock")
+
+    def __init__(self, size: int = 2, factory: Optional[Any] = None):
+        """
+        Initialize the pool and start filling it in the background.
+
+        Args:
+            size (int): The number of pre-built agents to keep ready.
+            factory (callable): Builds one compiled agent (default: ARMAAgent().build()).
+        """
+        self._factory = factory or (lambda: ARMAAgent().build())
+        self._agents = queue.Queue(maxsize=max(size, 1))
+        self._refill_lock = threading.Lock()
+        self.refill()
+
+    def _fill(self) -> None:
+        """Build agents until the pool is full."""
+        with self._refill_lock:
+            while not self._agents.full():
+                try:
+                    self._agents.put_nowait(self._factory())
+                except queue.Full:
+                    break
+                except Exception as e:
+                    logger.error(f"Failed to pre-build ARMA agent: {e}")
+                    break
+
+    def refill(self) -> None:
+        """Top the pool back up on a background thread, unless a refill is already running."""
+        if self._refill_lock.locked():
+            return
+        threading.Thread(target=self._fill, name="arma-agent-pool", daemon=True).start()
+
+    def acquire(self) -> Any:
+        """
+        Hand out a pre-built agent, or build one inline if the pool is empty.
+        Returns the compiled agent.
+        """
+        try:
+            agent = self._agents.get_nowait()
+        except queue.Empty:
+            agent = self._factory()
+        self.refill()
+        return agent
+
+def make_graph() -> Any:
+    """Build the ARMA graph; the entry point referenced by langgraph.json."""
+    return ARMAAgent().build()
+
+@functools.cache
+def get_agent_pool() -> AgentPool:
+    """Return the process-wide agent pool, sized by ARMA_AGENT_POOL_SIZE."""
+    return AgentPool(size=config.ARMA_AGENT_POOL_SIZE)
+
+def get_latest_state(arma: Any, config: RunnableConfig) -> dict:
+    """
+    Read the latest state of a thread straight from the checkpointer.
+    Unlike `arma.get_state(config)` this does not build a StateSnapshot (next tasks, subgraph states,
+    interrupts), so use it when only the channel values are needed.
+
+    Args:
+        arma: The compiled ARMA agent.
+        config (RunnableConfig): A config with the thread_id to read.
+    Returns:
+        The channel values of the latest checkpoint, or an empty dict if the thread has none.
+    """
+    checkpoint_tuple = arma.checkpointer.get_tuple(config)
+    return checkpoint_tuple.checkpoint["channel_values"] if checkpoint_tuple else {}
+
+def get_pending_interrupts(arma: Any, config: RunnableConfig) -> list:
+    """
+    Return the values of the interrupts a thread is waiting on, e.g. the prompt for missing fields.
+    get_latest_state does not include them. Answer them by running the next turn with turn_input(..., resume=True).
+
+    Args:
+        arma: The compiled ARMA agent.
+        config (RunnableConfig): A config with the thread_id to read.
+    Returns:
+        The interrupt values, or an empty list if the thread is not interrupted.
+    """
+    snapshot = arma.get_state(config)
+    return [pending.value for task in snapshot.tasks for pending in task.interrupts]
+
+def turn_input(user_input: str, resume: bool = False) -> Any:
+    """
+    Build the graph input for a user turn: a new message, or the answer to a pending interrupt.
+
+    Args:
+        user_input (str): The user's request or answer.
+        resume (bool): Whether the thread is waiting on an interrupt that this input answers.
+    """
+    if resume:
+        return Command(resume=user_input)
+    return {"messages": [HumanMessage(content=user_input)]}
+
+async def astream_arma(arma: Any, user_input: str, thread_id: str, resume: bool = False) -> AsyncIterator[str]:
+    """
+    Run one user turn through a compiled ARMA agent and yield the model's tokens as they are generated.
+    Internal LLM calls (tagged INTERNAL_LLM_TAG, e.g. JSON extraction) are skipped, and the output of
+    consecutive model calls is separated by a blank line. The final state can be read afterwards with get_latest_state.
+
+    Args:
+        arma: The compiled ARMA agent.
+        user_input (str): The user's request.
+        thread_id (str): The conversation thread to run the turn in.
+        resume (bool): Whether user_input answers an interrupt the thread is waiting on.
+    Yields:
+        The text of each streamed chat model chunk.
+    """
+    run_config = RunnableConfig(configurable={"thread_id": thread_id}, recursion_limit=config.ARMA_RECURSION_LIMIT)
+    streamed = False
+    separate = False
+    async for event in arma.astream_events(
+        turn_input(user_input, resume),
+        config=run_config,
+        version="v2",
+        durability="exit"
+    ):
+        if INTERNAL_LLM_TAG in event.get("tags", []):
+            continue
+        if event["event"] == "on_chat_model_start":
+            # only separate once the new model call actually produces text (tool-call-only turns have none)
+            separate = streamed
+        elif event["event"] == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if content and isinstance(content, str):
+                if separate:
+                    yield "\n\n"
+                    separate = False
+                streamed = True
+                yield content
+
+async def abatch_arma(arma: Any, user_inputs: List[str], max_concurrency: int = 10) -> list:
+    """
+    Run independent requests concurrently, each in its own thread, using the graph's batch path.
+    The threads are not returned to the caller, so they are deleted from the checkpointer once the batch is done.
+
+    Args:
+        arma: The compiled ARMA agent.
+        user_inputs (list): The user's requests.
+        max_concurrency (int): The maximum number of concurrent graph runs.
+    Returns:
+        The final graph state, or the raised exception, for each request in order.
+    """
+    # One urandom read for the whole batch instead of one per uuid4()
+    raw = os.urandom(16 * len(user_inputs))
+    thread_ids = [str(uuid.UUID(bytes=raw[i * 16:(i + 1) * 16], version=4)) for i in range(len(user_inputs))]
+    configs = [
+        RunnableConfig(
+            configurable={"thread_id": thread_id},
+            max_concurrency=max_concurrency,
+            recursion_limit=config.ARMA_RECURSION_LIMIT
+        )
+        for thread_id in thread_ids
+    ]
+    try:
+        return await arma.abatch(
+            [{"messages": [HumanMessage(content=user_input)]} for user_input in user_inputs],
+            config=configs,
+            return_exceptions=True,
+            durability="exit"
+        )
+    finally:
+        for thread_id in thread_ids:
+            arma.checkpointer.delete_thread(thread_id)
+
+async def main() -> None:
+    """
+    Console harness. Requests passed as arguments (python arma.py "request 1" "request 2") are run as a batch;
+    otherwise requests are read from stdin one at a time and the response is streamed to stdout.
+    """
+    # The harness is an entry point, so it configures logging itself (the library modules only add a NullHandler)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    arma = ARMAAgent().build()
+    if sys.argv[1:]:
+        for user_input, response in zip(sys.argv[1:], await abatch_arma(arma, sys.argv[1:])):
+            print(f"User input: {user_input}")
+            if isinstance(response, Exception):
+                print(f"Workflow failed: {response}")
+                continue
+            for message in response["messages"]:
+                message.pretty_print()
+        return
+
+    thread_id = str(uuid.uuid4())
+    thread_config = RunnableConfig(configurable={"thread_id": thread_id})
+    resume = False
+    while True:
+        cmd = await asyncio.to_thread(input, "Enter your request (or 'exit' to quit): ")
+        if cmd == "exit":
+            print("Exiting...")
+            break
+        try:
+            # Print tokens as they arrive instead of waiting for the whole turn to finish
+            async for token in astream_arma(arma, cmd, thread_id, resume=resume):
+                sys.stdout.write(token)
+                sys.stdout.flush()
+            print()
+            # If the graph is waiting for input (e.g. missing fields), show the question; the next input answers it
+            interrupts = get_pending_interrupts(arma, thread_config)
+            for value in interrupts:
+                print(value)
+            resume = bool(interrupts)
+        except Exception as e:
+            print(f"Workflow failed: {e}")
+            resume = False
 
+if __name__ == "__main__":
+    asyncio.run(main())
 
 # Sample requests:
 # create a storage account named eoaiteststorg01 in resource group myrg, subscription e98a7bdd-1e97-452c-939c-4edf569d31f6, location eastus
\ No newline at end of file
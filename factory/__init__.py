@@ -1,7 +1,7 @@
 """
 This module provides a factory for creating LLM instances.
 """
-from .llm_factory import LLMFactory
+from .llm_factory import LLMFactory, INTERNAL_LLM_TAG
 from .config import config
 
-__all__ = ["LLMFactory", "config"]
\ No newline at end of file
+__all__ = ["LLMFactory", "config", "INTERNAL_LLM_TAG"]
\ No newline at end of file
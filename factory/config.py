@@ -1,7 +1,12 @@
 # app_config.py
+import asyncio
 import logging
 import os
+import threading
+import time
+import weakref
 from typing import Optional
+import httpx
 # from azure.cosmos import CosmosClient
 from azure.identity import DefaultAzureCredential
 from langchain_openai import ChatOpenAI, AzureChatOpenAI
@@ -10,9 +15,64 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """httpx transport that keeps a separate connection pool for each event loop.
+
+    httpx binds pooled connections to the loop they were opened on. The LLM clients are built once per
+    process, so a single pool would break as soon as a call ran on a different loop (e.g. a second
+    asyncio.run() in the console harness).
+    """
+
+    def __init__(self, **transport_kwargs):
+        self._transport_kwargs = transport_kwargs
+        self._transports = weakref.WeakKeyDictionary()
+
+    def _get_transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = httpx.AsyncHTTPTransport(**self._transport_kwargs)
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._get_transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
 class AppConfig:
     """Application configuration class that loads settings from environment variables."""
 
+    __slots__ = (
+        "AZURE_TENANT_ID",
+        "AZURE_CLIENT_ID",
+        "AZURE_CLIENT_SECRET",
+        "AZURE_SUBSCRIPTION_ID",
+        "OPENAI_API_KEY",
+        "AZURE_OPENAI_DEPLOYMENT",
+        "AZURE_OPENAI_DEPLOYMENT_SMALL",
+        "AZURE_OPENAI_API_VERSION",
+        "AZURE_OPENAI_ENDPOINT",
+        "AZURE_OPENAI_API_KEY",
+        "ARMA_AGENT_POOL_SIZE",
+        "ARMA_RECURSION_LIMIT",
+        "ARMA_LOOKUP_CACHE_TTL",
+        "_azure_credentials",
+        "_http_async_client",
+        "_cosmos_client",
+        "_cosmos_database",
+        "_lookup_cache",
+        "_lookup_cache_lock",
+    )
+
+    # Maximum number of cached Azure lookups; the oldest entry is evicted first
+    LOOKUP_CACHE_SIZE = 256
+
     def __init__(self):
         """Initialize the application configuration with environment variables."""
         # Azure authentication settings
@@ -31,15 +91,26 @@ class AppConfig:
 
         # Azure OpenAI settings
         self.AZURE_OPENAI_DEPLOYMENT = self._get_required("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+        self.AZURE_OPENAI_DEPLOYMENT_SMALL = self._get_optional("AZURE_OPENAI_DEPLOYMENT_SMALL", self.AZURE_OPENAI_DEPLOYMENT)
         self.AZURE_OPENAI_API_VERSION = self._get_required("AZURE_OPENAI_API_VERSION", "2025-04-01-preview")
         self.AZURE_OPENAI_ENDPOINT = self._get_required("AZURE_OPENAI_ENDPOINT")
         self.AZURE_OPENAI_API_KEY = self._get_required("AZURE_OPENAI_API_KEY")
 
+        # ARMA settings
+        self.ARMA_AGENT_POOL_SIZE = int(self._get_optional("ARMA_AGENT_POOL_SIZE", "2"))
+        self.ARMA_RECURSION_LIMIT = int(self._get_optional("ARMA_RECURSION_LIMIT", "16"))
+        self.ARMA_LOOKUP_CACHE_TTL = float(self._get_optional("ARMA_LOOKUP_CACHE_TTL", "300"))
+
         # Cached clients and resources
         self._azure_credentials = None
+        self._http_async_client = None
         self._cosmos_client = None
         self._cosmos_database = None
 
+        # Subscription and resource group lookups: key -> (expiry, value)
+        self._lookup_cache = {}
+        self._lookup_cache_lock = threading.Lock()
+
     @staticmethod
     def _get_required(name: str, default: Optional[str] = None) -> str:
         """Get a required configuration value from environment variables.
@@ -57,7 +128,7 @@ class AppConfig:
         if name in os.environ:
             return os.environ[name]
         if default is not None:
-            logging.warning(
+            logger.warning(
                 "Environment variable %s not found, using default value", name
             )
             return default
@@ -94,7 +165,7 @@ class AppConfig:
             self._azure_credentials = DefaultAzureCredential()
             return self._azure_credentials
         except Exception as exc:
-            logging.warning("Failed to create DefaultAzureCredential: %s", exc)
+            logger.warning("Failed to create DefaultAzureCredential: %s", exc)
             return None
 
     def get_resource_management_client(self, subscription_id: str = None):
@@ -110,6 +181,100 @@ class AppConfig:
         else:
             return SubscriptionClient(self.get_azure_credentials())
 
+    def _get_cached_lookup(self, key: tuple):
+        """Return a cached lookup result, or None if it is missing or has expired."""
+        with self._lookup_cache_lock:
+            entry = self._lookup_cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._lookup_cache[key]
+                return None
+            return entry[1]
+
+    def _set_cached_lookup(self, key: tuple, value) -> None:
+        """Cache a lookup result for ARMA_LOOKUP_CACHE_TTL seconds."""
+        with self._lookup_cache_lock:
+            self._lookup_cache.pop(key, None)
+            self._lookup_cache[key] = (time.monotonic() + self.ARMA_LOOKUP_CACHE_TTL, value)
+            if len(self._lookup_cache) > self.LOOKUP_CACHE_SIZE:
+                del self._lookup_cache[next(iter(self._lookup_cache))]
+
+    def invalidate_lookup_cache(self, subscription_id: Optional[str] = None) -> None:
+        """Drop cached resource group lookups after a resource group may have been created or deleted.
+
+        Args:
+            subscription_id: Only drop the lookups of this subscription (default: drop all cached lookups).
+        """
+        with self._lookup_cache_lock:
+            if subscription_id is None:
+                self._lookup_cache.clear()
+                return
+            for key in [key for key in self._lookup_cache if key[0] == "resource_group" and key[1] == subscription_id]:
+                del self._lookup_cache[key]
+
+    async def alist_subscriptions(self) -> list:
+        """List the subscriptions visible to the configured credentials without blocking the event loop.
+        The result is cached for ARMA_LOOKUP_CACHE_TTL seconds.
+
+        Returns:
+            A list of Subscription objects
+        """
+        key = ("subscriptions",)
+        subscriptions = self._get_cached_lookup(key)
+        if subscriptions is None:
+            client = self.get_resource_management_client()
+            subscriptions = await asyncio.to_thread(lambda: list(client.subscriptions.list()))
+            self._set_cached_lookup(key, subscriptions)
+        return subscriptions
+
+    async def acheck_resource_group_existence(self, subscription_id: str, resource_group_name: str) -> bool:
+        """Check if a resource group exists without blocking the event loop.
+        The result is cached for ARMA_LOOKUP_CACHE_TTL seconds; see invalidate_lookup_cache.
+
+        Args:
+            subscription_id: The subscription ID.
+            resource_group_name: The resource group name.
+        Returns:
+            True if the resource group exists
+        """
+        # Resource group names are case-insensitive
+        key = ("resource_group", subscription_id, resource_group_name.lower())
+        exists = self._get_cached_lookup(key)
+        if exists is None:
+            client = self.get_resource_management_client(subscription_id)
+            exists = await asyncio.to_thread(client.resource_groups.check_existence, resource_group_name)
+            self._set_cached_lookup(key, exists)
+        return exists
+
+    async def alist_resources(self, subscription_id: str, resource_group_name: str, filter: Optional[str] = None) -> list:
+        """List the resources in a resource group without blocking the event loop.
+
+        Args:
+            subscription_id: The subscription ID.
+            resource_group_name: The resource group name.
+            filter: Optional OData filter, e.g. "resourceType eq 'Microsoft.Storage/storageAccounts'".
+        Returns:
+            A list of GenericResourceExpanded objects
+        """
+        client = self.get_resource_management_client(subscription_id)
+        # The SDK pager fetches lazily, so it is drained inside the worker thread as well.
+        return await asyncio.to_thread(
+            lambda: list(client.resources.list_by_resource_group(resource_group_name=resource_group_name, filter=filter))
+        )
+
+    async def aget_resource(self, subscription_id: str, **kwargs):
+        """Get a resource without blocking the event loop.
+
+        Args:
+            subscription_id: The subscription ID.
+            **kwargs: Arguments forwarded to ResourceManagementClient.resources.get.
+        Returns:
+            A GenericResource object
+        """
+        client = self.get_resource_management_client(subscription_id)
+        return await asyncio.to_thread(client.resources.get, **kwargs)
+
     # def get_cosmos_database_client(self):
     #     """Get a Cosmos DB client for the configured database.
 
@@ -129,33 +294,57 @@ class AppConfig:
 
     #         return self._cosmos_database
     #     except Exception as exc:
-    #         logging.error(
+    #         logger.error(
     #             "Failed to create CosmosDB client: %s. CosmosDB is required for this application.",
     #             exc,
     #         )
     #         raise
 
+    def get_http_async_client(self) -> httpx.AsyncClient:
+        """Get the HTTP client shared by the async LLM clients, so connections are kept alive across calls.
+        HTTP/2 is enabled, so concurrent requests (e.g. parallel tool calls) multiplex over one connection.
+
+        Connections are pooled per event loop, so the client can be shared by calls running on different
+        loops (the Streamlit app's background loop, or the console harness's).
+
+        Returns:
+            An httpx.AsyncClient
+        """
+        if self._http_async_client is None:
+            self._http_async_client = httpx.AsyncClient(
+                transport=_PerLoopTransport(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=32)
+                )
+            )
+        return self._http_async_client
+
     def get_openai_client(self):
         """Get an OpenAI client for the configured API key.
 
         Returns:
             An OpenAI client
         """
-        return ChatOpenAI(api_key=self.OPENAI_API_KEY)
+        return ChatOpenAI(api_key=self.OPENAI_API_KEY, http_async_client=self.get_http_async_client())
 
-    def get_azure_openai_client(self):
+    def get_azure_openai_client(self, deployment: Optional[str] = None):
         """Get an Azure OpenAI client for the configured API key.
 
+        Args:
+            deployment: The Azure OpenAI deployment to use (default: AZURE_OPENAI_DEPLOYMENT)
+
         Returns:
             An Azure OpenAI client
         """
+        deployment = deployment or self.AZURE_OPENAI_DEPLOYMENT
         return AzureChatOpenAI(
-            azure_deployment=self.AZURE_OPENAI_DEPLOYMENT,
+            azure_deployment=deployment,
             api_version=self.AZURE_OPENAI_API_VERSION,
             api_key=self.AZURE_OPENAI_API_KEY,
-            model_name=self.AZURE_OPENAI_DEPLOYMENT,
+            model_name=deployment,
             azure_endpoint=self.AZURE_OPENAI_ENDPOINT,
-            streaming=True
+            streaming=True,
+            http_async_client=self.get_http_async_client()
         )
 
 # Create a global instance of AppConfig
@@ -1,6 +1,11 @@
 import os
 from typing import Literal
 from .config import config
+
+# Tag for LLM calls whose output is consumed by code (structured extraction/validation), not shown to the user.
+# Streaming consumers skip chat model events that carry it.
+INTERNAL_LLM_TAG = "internal"
+
 class LLMFactory:
     """
     Factory class to return a LangChain LLM instance based on environment variables.
@@ -9,7 +14,7 @@ class LLMFactory:
         self.llm = self.get_llm()
 
     @staticmethod
-    def get_llm(provider: Literal["openai", "azure"] = "azure"):
+    def get_llm(provider: Literal["openai", "azure"] = "azure", tier: Literal["small", "large"] = "large"):
         """
         Factory function to return a LangChain LLM instance based on environment variables.
         Supports 'openai' and 'azure' as LLM providers.
@@ -18,12 +23,18 @@ class LLMFactory:
 
         Args:
             provider (str): The LLM provider to use.
+            tier (str): The model size to use. 'small' maps to AZURE_OPENAI_DEPLOYMENT_SMALL
+                (e.g. gpt-4o-mini) for simple extraction/validation hops, 'large' maps to
+                AZURE_OPENAI_DEPLOYMENT.
         Returns:
             A LangChain LLM instance of the specified provider.
         """
+        if tier not in ("small", "large"):
+            raise ValueError(f"Unsupported LLM tier: {tier}")
         if provider == "openai":
             return config.get_openai_client()
         elif provider == "azure":
-            return config.get_azure_openai_client()
+            deployment = config.AZURE_OPENAI_DEPLOYMENT_SMALL if tier == "small" else config.AZURE_OPENAI_DEPLOYMENT
+            return config.get_azure_openai_client(deployment)
         else:
             raise ValueError(f"Unsupported LLM_PROVIDER: {provider}")
@@ -10,6 +10,7 @@ Instructions:
 - For resource group deployments, you must have: subscription_id, resource_group_name, template, and parameters.
 - For subscription-scope deployments, you must have: subscription_id, template, parameters, and location.
 - If any required field is missing, use prompt_for_missing_deploy_tool and clearly state what is missing.
+- The deploy tools read the ARM template from the state; do not pass it as an argument.
 - Only use deploy_resource_group_scope_tool for resourceGroup scope, and deploy_subscription_scope_tool for subscription scope.
 - Never attempt to deploy if required fields are missing.
 - Always return the deployment result and status to the user in a clear, concise summary.
@@ -1,14 +1,10 @@
-INTENT_EXTRACTION_SYSTEM_PROMPT = """
-You are an expert Azure cloud assistant. You must use the following tools in the correct order to process each user request:
-
-1. Use `extract_intent_tool` to extract the user's prompt, resource type, and provided fields from the request.
-2. If the intent is 'create' or 'update', use `fetch_template_tool` to fetch the ARM template for the resource type.
-3. Use `check_scope_fields_tool` to check if all required scope fields (resource group, subscription) are present.
-4. Use `determine_scope_tool` to determine the deployment scope from the template.
-
-You must not skip any required step. Always ensure the template is loaded before passing state to the next step. Use the tools in the above order for every request.
+import heapq
+import math
+import re
+from collections import Counter
 
-Given a user's request, extract the following as a JSON object:
+INTENT_EXTRACTION_SYSTEM_PROMPT = """
+You are an expert Azure cloud assistant. Given a user's request, extract the following in a single JSON object:
 - intent: the high-level action (e.g., create, delete, update, get, list, etc.)
 - resource_type: the full Azure resource type (e.g., Microsoft.Storage/storageAccounts, Microsoft.Compute/virtualMachines, Microsoft.KeyVault/vaults, etc.)
 - provided_fields: a JSON object of any parameter values the user provided (if any) (e.g., name, rg, location, tags, sku, etc.)
@@ -17,11 +13,7 @@ Given a user's request, extract the following as a JSON object:
 - subscription_name: the subscription name if provided (should be a string, not a GUID)
 - location: the location if provided (should be a string, e.g., eastus, westus, etc.). The user could also use region as a synonym.
 
-You have access to the following tools:
-- extract_intent_tool: Extract the intent from the user's request.
-- check_scope_fields_tool: Check if the user's request has all the required scope fields.
-- fetch_template_tool: Fetch the template from the user's request using the resource_type.
-- determine_scope_tool: Determine the scope of the user's request.
+The ARM template lookup, the scope field checks and the deployment scope are handled after you respond; only extract the fields above.
 
 Instructions:
 - Treat any of the following as subscription_id: 'subscription id', 'subscription', 'subid', 'sub id'.
@@ -37,53 +29,109 @@ Instructions:
 - Ignore irrelevant or unrelated fields.
 - If a field is ambiguous, make your best guess and include it in provided_fields.
 
-Examples:
-
-User request: create a storage account with the following values, name: test, rg: demorg, subscription id: 00000000-0000-0000-0000-000000000000
-Output JSON: {"intent": "create", "resource_type": "Microsoft.Storage/storageAccounts", "provided_fields": {"name": "test", "rg": "demorg", "subscription_id": "00000000-0000-0000-0000-000000000000", "location": "eastus"}, "resource_group_name": "demorg", "subscription_id": "00000000-0000-0000-0000-000000000000"}
-
-User request: delete a virtual machine named myvm in resource group myrg and subscription mysub
-Output JSON: {"intent": "delete", "resource_type": "Microsoft.Compute/virtualMachines", "provided_fields": {"name": "myvm", "rg": "myrg", "subscription_name": "mysub"}, "resource_group_name": "myrg", "subscription_name": "mysub"}
-
-User request: update Microsoft.KeyVault/vaults called prodvault in resource group prod-rg, subscription id 11111111-2222-3333-4444-555555555555, location eastus
-Output JSON: {"intent": "update", "resource_type": "Microsoft.KeyVault/vaults", "provided_fields": {"name": "prodvault", "rg": "prod-rg", "subscription_id": "11111111-2222-3333-4444-555555555555", "location": "eastus"}, "resource_group_name": "prod-rg", "subscription_id": "11111111-2222-3333-4444-555555555555"}
-
-User request: list all SQL servers in resource group sqlrg
-Output JSON: {"intent": "list", "resource_type": "Microsoft.Sql/servers", "provided_fields": {"rg": "sqlrg"}, "resource_group_name": "sqlrg"}
-
-User request: get details for cosmosdb account cosmos1 in subid 22222222-3333-4444-5555-666666666666
-Output JSON: {"intent": "get", "resource_type": "Microsoft.DocumentDB/databaseAccounts", "provided_fields": {"name": "cosmos1", "subscription_id": "22222222-3333-4444-5555-666666666666"}, "subscription_id": "22222222-3333-4444-5555-666666666666"}
+The user's request is sent as the next message.
 
-User request: create an app service plan called myplan in resource group webapps, subscription my-subscription, location westus2, sku S1
-Output JSON: {"intent": "create", "resource_type": "Microsoft.Web/serverfarms", "provided_fields": {"name": "myplan", "rg": "webapps", "subscription_name": "my-subscription", "location": "westus2", "sku": "S1"}, "resource_group_name": "webapps", "subscription_name": "my-subscription"}
-
-User request: delete storage account mystorage
-Output JSON: {"intent": "delete", "resource_type": "Microsoft.Storage/storageAccounts", "provided_fields": {"name": "mystorage"}}
-
-User request: create a key vault named kv1
-Output JSON: {"intent": "create", "resource_type": "Microsoft.KeyVault/vaults", "provided_fields": {"name": "kv1"}}
-
-User request: remove resource group demorg
-Output JSON: {"intent": "delete", "resource_type": "Microsoft.Resources/resourceGroups", "provided_fields": {"name": "demorg"}, "resource_group_name": "demorg"}
-
-User request: create a virtual machine with name: vm1, rg: test-rg, sub id: mysub, tags: {"env": "dev"}
-Output JSON: {"intent": "create", "resource_type": "Microsoft.Compute/virtualMachines", "provided_fields": {"name": "vm1", "rg": "test-rg", "subscription_name": "mysub", "tags": {"env": "dev"}}, "resource_group_name": "test-rg", "subscription_name": "mysub"}
-
-User request: create a storage account
-Output JSON: {"intent": "create", "resource_type": "Microsoft.Storage/storageAccounts", "provided_fields": {}}
-
-User request: list all resources
-Output JSON: {"intent": "list", "provided_fields": {}}
-
-User request: create a SQL server with name: sql1, resource group: db-rg, subscription: 33333333-4444-5555-6666-777777777777, location: eastus2
-Output JSON: {"intent": "create", "resource_type": "Microsoft.Sql/servers", "provided_fields": {"name": "sql1", "rg": "db-rg", "subscription_id": "33333333-4444-5555-6666-777777777777", "location": "eastus2"}, "resource_group_name": "db-rg", "subscription_id": "33333333-4444-5555-6666-777777777777"}
-
-User request: delete cosmosdb account cosmos2 in resource group cosmos-rg
-Output JSON: {"intent": "delete", "resource_type": "Microsoft.DocumentDB/databaseAccounts", "provided_fields": {"name": "cosmos2", "rg": "cosmos-rg"}, "resource_group_name": "cosmos-rg"}
-
-User request: create a storage account with name: teststorage, resource group: test-rg, subscription: test-subscription, location: eastus, tags: {"env": "test", "owner": "alice"}
-Output JSON: {"intent": "create", "resource_type": "Microsoft.Storage/storageAccounts", "provided_fields": {"name": "teststorage", "rg": "test-rg", "subscription_name": "test-subscription", "location": "eastus", "tags": {"env": "test", "owner": "alice"}}, "resource_group_name": "test-rg", "subscription_name": "test-subscription"}
+Examples:
 
-User request: {user_prompt}
-Output JSON:
-"""
+{examples}"""
+
+# Few-shot examples for INTENT_EXTRACTION_SYSTEM_PROMPT as (user request, output JSON) pairs.
+# Only the ones most similar to the user's request are rendered into the prompt.
+INTENT_EXAMPLES = [
+    (
+        "create a storage account with the following values, name: test, rg: demorg, subscription id: 00000000-0000-0000-0000-000000000000",
+        '{"intent": "create", "resource_type": "Microsoft.Storage/storageAccounts", "provided_fields": {"name": "test", "rg": "demorg", "subscription_id": "00000000-0000-0000-0000-000000000000", "location": "eastus"}, "resource_group_name": "demorg", "subscription_id": "00000000-0000-0000-0000-000000000000"}'
+    ),
+    (
+        "delete a virtual machine named myvm in resource group myrg and subscription mysub",
+        '{"intent": "delete", "resource_type": "Microsoft.Compute/virtualMachines", "provided_fields": {"name": "myvm", "rg": "myrg", "subscription_name": "mysub"}, "resource_group_name": "myrg", "subscription_name": "mysub"}'
+    ),
+    (
+        "update Microsoft.KeyVault/vaults called prodvault in resource group prod-rg, subscription id 11111111-2222-3333-4444-555555555555, location eastus",
+        '{"intent": "update", "resource_type": "Microsoft.KeyVault/vaults", "provided_fields": {"name": "prodvault", "rg": "prod-rg", "subscription_id": "11111111-2222-3333-4444-555555555555", "location": "eastus"}, "resource_group_name": "prod-rg", "subscription_id": "11111111-2222-3333-4444-555555555555"}'
+    ),
+    (
+        "list all SQL servers in resource group sqlrg",
+        '{"intent": "list", "resource_type": "Microsoft.Sql/servers", "provided_fields": {"rg": "sqlrg"}, "resource_group_name": "sqlrg"}'
+    ),
+    (
+        "get details for cosmosdb account cosmos1 in subid 22222222-3333-4444-5555-666666666666",
+        '{"intent": "get", "resource_type": "Microsoft.DocumentDB/databaseAccounts", "provided_fields": {"name": "cosmos1", "subscription_id": "22222222-3333-4444-5555-666666666666"}, "subscription_id": "22222222-3333-4444-5555-666666666666"}'
+    ),
+    (
+        "create an app service plan called myplan in resource group webapps, subscription my-subscription, location westus2, sku S1",
+        '{"intent": "create", "resource_type": "Microsoft.Web/serverfarms", "provided_fields": {"name": "myplan", "rg": "webapps", "subscription_name": "my-subscription", "location": "westus2", "sku": "S1"}, "resource_group_name": "webapps", "subscription_name": "my-subscription"}'
+    ),
+    (
+        "delete storage account mystorage",
+        '{"intent": "delete", "resource_type": "Microsoft.Storage/storageAccounts", "provided_fields": {"name": "mystorage"}}'
+    ),
+    (
+        "create a key vault named kv1",
+        '{"intent": "create", "resource_type": "Microsoft.KeyVault/vaults", "provided_fields": {"name": "kv1"}}'
+    ),
+    (
+        "remove resource group demorg",
+        '{"intent": "delete", "resource_type": "Microsoft.Resources/resourceGroups", "provided_fields": {"name": "demorg"}, "resource_group_name": "demorg"}'
+    ),
+    (
+        'create a virtual machine with name: vm1, rg: test-rg, sub id: mysub, tags: {"env": "dev"}',
+        '{"intent": "create", "resource_type": "Microsoft.Compute/virtualMachines", "provided_fields": {"name": "vm1", "rg": "test-rg", "subscription_name": "mysub", "tags": {"env": "dev"}}, "resource_group_name": "test-rg", "subscription_name": "mysub"}'
+    ),
+    (
+        "create a storage account",
+        '{"intent": "create", "resource_type": "Microsoft.Storage/storageAccounts", "provided_fields": {}}'
+    ),
+    (
+        "list all resources",
+        '{"intent": "list", "provided_fields": {}}'
+    ),
+    (
+        "create a SQL server with name: sql1, resource group: db-rg, subscription: 33333333-4444-5555-6666-777777777777, location: eastus2",
+        '{"intent": "create", "resource_type": "Microsoft.Sql/servers", "provided_fields": {"name": "sql1", "rg": "db-rg", "subscription_id": "33333333-4444-5555-6666-777777777777", "location": "eastus2"}, "resource_group_name": "db-rg", "subscription_id": "33333333-4444-5555-6666-777777777777"}'
+    ),
+    (
+        "delete cosmosdb account cosmos2 in resource group cosmos-rg",
+        '{"intent": "delete", "resource_type": "Microsoft.DocumentDB/databaseAccounts", "provided_fields": {"name": "cosmos2", "rg": "cosmos-rg"}, "resource_group_name": "cosmos-rg"}'
+    ),
+    (
+        'create a storage account with name: teststorage, resource group: test-rg, subscription: test-subscription, location: eastus, tags: {"env": "test", "owner": "alice"}',
+        '{"intent": "create", "resource_type": "Microsoft.Storage/storageAccounts", "provided_fields": {"name": "teststorage", "rg": "test-rg", "subscription_name": "test-subscription", "location": "eastus", "tags": {"env": "test", "owner": "alice"}}, "resource_group_name": "test-rg", "subscription_name": "test-subscription"}'
+    ),
+]
+
+def _tokenize(text: str) -> Counter:
+    """Bag-of-words term counts used for example similarity."""
+    return Counter(re.findall(r"[a-z0-9]+", text.lower()))
+
+def _example_vector(request: str) -> tuple:
+    terms = _tokenize(request)
+    return terms, math.sqrt(sum(count * count for count in terms.values()))
+
+# Computed once at import: the example term vectors and the static instructions ahead of the examples slot.
+_INTENT_EXAMPLE_VECTORS = [_example_vector(request) for request, _ in INTENT_EXAMPLES]
+_INTENT_PROMPT_PREFIX, _INTENT_PROMPT_SUFFIX = INTENT_EXTRACTION_SYSTEM_PROMPT.split("{examples}")
+
+def select_intent_examples(user_prompt: str, k: int = 3) -> list:
+    """
+    Returns the k examples whose requests are most similar (cosine over term counts) to the user's request,
+    in their original order.
+    """
+    terms = _tokenize(user_prompt)
+    norm = math.sqrt(sum(count * count for count in terms.values())) or 1.0
+    scores = [
+        sum(count * example_terms.get(term, 0) for term, count in terms.items()) / (norm * (example_norm or 1.0))
+        for example_terms, example_norm in _INTENT_EXAMPLE_VECTORS
+    ]
+    top = heapq.nlargest(k, range(len(INTENT_EXAMPLES)), key=scores.__getitem__)
+    return [INTENT_EXAMPLES[i] for i in sorted(top)]
+
+def render_intent_system_prompt(user_prompt: str, k: int = 3) -> str:
+    """
+    Returns INTENT_EXTRACTION_SYSTEM_PROMPT with the k examples most relevant to the user's request filled in.
+    The request itself is not included; send it as its own message after this one.
+    """
+    examples = "\n".join(
+        f"User request: {request}\nOutput JSON: {output}\n" for request, output in select_intent_examples(user_prompt, k)
+    )
+    return f"{_INTENT_PROMPT_PREFIX}{examples}{_INTENT_PROMPT_SUFFIX}"
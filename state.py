@@ -1,17 +1,27 @@
 """
-State schemas for the master graph.
+State schemas for the master graph and its subgraphs.
 """
 
 from typing import Optional, Literal, Annotated
 from typing_extensions import TypedDict
-from pydantic import Field
 from langchain_core.messages import AnyMessage
 from langgraph.graph.message import add_messages
+from langgraph.managed import RemainingSteps
 
-class ARMAState(TypedDict):
+def append_messages(current, update):
+    """
+    Append-only reducer for one-shot subgraphs. Unlike add_messages it does not look up message ids to
+    replace or remove existing messages; the parent graph's add_messages still merges the output by id.
+    """
+    if not update:
+        return current
+    return current + (update if isinstance(update, list) else [update])
+
+class ARMAState(TypedDict, total=False):
     """
     State schema for the master graph.
     """
+    # Append-only: callers pass only the new turn's messages and the reducer merges them by id.
     messages: Annotated[list[AnyMessage], add_messages]
     prompt: str
     intent: Literal["create", "delete", "update", "get", "list"]
@@ -38,4 +48,26 @@ class ARMAState(TypedDict):
     deployment_status: Optional[str]
     deployment_error: Optional[str]
     deployment_result: Optional[dict]
-    remaining_steps: Optional[list]
\ No newline at end of file
+    # Managed by LangGraph: recursion_limit minus the steps taken so far. The react agents read it to
+    # return a final answer before the limit is hit instead of raising GraphRecursionError.
+    remaining_steps: RemainingSteps
+
+
+class IntentState(TypedDict, total=False):
+    """
+    State schema for the intent detection subgraph. It runs once per turn and only appends messages,
+    so it uses append_messages instead of add_messages.
+    """
+    messages: Annotated[list[AnyMessage], append_messages]
+    prompt: str
+    intent: Optional[str]
+    resource_type: Optional[str]
+    provided_fields: Optional[dict]
+    resource_group_name: Optional[str]
+    subscription_id: Optional[str]
+    subscription_name: Optional[str]
+    location: Optional[str]
+    missing_scope_fields: Optional[list]
+    missing_scope_message: Optional[str]
+    template: Optional[dict]
+    scope: Optional[str]
@@ -4,15 +4,34 @@ This file contains the Streamlit app for the ARMA agent.
 
 import streamlit as st
 import uuid
+import queue
 import asyncio
+import itertools
+from typing import Any
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain.schema.runnable.config import RunnableConfig
-from utils import get_streamlit_cb
-from arma import ARMAAgent
+from utils import get_streamlit_cb, configure_logging, start_event_loop
 
-# Initialize the ARMA workflow
-arma_agent = ARMAAgent()
-arma = arma_agent.build()
+# set up the queue-based handlers before the app modules are imported, so nothing they log at import time
+# (e.g. the config warnings) goes to a default stderr handler
+configure_logging()
+
+from arma import get_agent_pool, get_latest_state, get_pending_interrupts, turn_input, abatch_arma  # noqa: E402
+from factory import config as app_config, INTERNAL_LLM_TAG  # noqa: E402
+from agents.intent_agent import preload_templates  # noqa: E402
+
+@st.cache_resource(show_spinner=False)
+def get_arma_pool():
+    """Return the pre-built agent cache; created once per process rather than on every script rerun."""
+    return get_agent_pool()
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop that runs the graph. Reusing one loop lets the LLM clients'
+    open connections (pooled per loop) be reused across turns and sessions.
+    """
+    return start_event_loop()
 
 st.set_page_config(
     page_title="ARMA",
@@ -23,6 +42,11 @@ st.set_page_config(
     }
 )
 
+# Hand each session a pre-built ARMA agent from the cache
+if "arma" not in st.session_state:
+    st.session_state.arma = get_arma_pool().acquire()
+arma = st.session_state.arma
+
 col1, col2 = st.columns([1, 5])
 with col1:
     st.image("assets/images/arma_logo.png")
@@ -56,8 +80,15 @@ with st.expander("Azure Resource Management Assistant (ARMA) via Natural Languag
 if "messages" not in st.session_state:
     st.session_state.messages = [AIMessage(content="How can I help you today?")]
 
-if "thread_id" not in st.session_state:
-    st.session_state.thread_id = str(uuid.uuid4())
+def new_thread_id() -> str:
+    """
+    Derive a new thread id from the session's base id instead of drawing a fresh UUID per chat.
+    The base id only needs to be unique, not unpredictable, so a time-based uuid1 is used.
+    """
+    if "thread_base_id" not in st.session_state:
+        st.session_state.thread_base_id = uuid.uuid1().hex
+        st.session_state.thread_counter = itertools.count()
+    return f"{st.session_state.thread_base_id}-{next(st.session_state.thread_counter)}"
 
 if "user_id" not in st.session_state:
     st.session_state.user_id = "user_1"
@@ -66,7 +97,9 @@ if "user_id" not in st.session_state:
 with st.sidebar:
   if st.button("New Chat", use_container_width=True, icon=":material/chat:"):
       st.session_state.messages = []
-      st.session_state.thread_id = str(uuid.uuid4())
+      # a new thread id is drawn when the next message is sent
+      st.session_state.pop("thread_id", None)
+      st.session_state.pop("awaiting_answer", None)
       st.session_state.user_id = "user_1"
       st.rerun()
 
@@ -76,6 +109,12 @@ with st.sidebar:
           "https://github.com/eosho/ARMA/blob/main/assets/images/architecture.png?raw=true"
       )
 
+  st.toggle(
+      "Batch mode",
+      key="batch_mode",
+      help="Run each line of the next message as a separate, independent request."
+  )
+
   if st.button("Architecture", use_container_width=True, icon=":material/schema:"):
       architecture_dialog()
 
@@ -84,37 +123,150 @@ with st.sidebar:
           "Prompts, responses and feedback in this app are not logged."
       )
 
-# Messages implementation
-for msg in st.session_state.messages:
-    if type(msg) == AIMessage:
-        st.chat_message("assistant").markdown(msg.content)
-    if type(msg) == HumanMessage:
-        st.chat_message("user").markdown(msg.content)
+def get_history_blocks() -> list:
+    """
+    Group the chat history into (role, contents) blocks, merging consecutive messages from the same role.
+    The blocks are kept in the session across reruns, keyed by the history length, so each rerun only
+    processes the messages added since the previous one.
+    """
+    messages = st.session_state.messages
+    cache = st.session_state.get("history_cache")
+    # start over when the history was replaced (New Chat) or shrank
+    if cache is None or cache["messages_id"] != id(messages) or cache["length"] > len(messages):
+        cache = {"messages_id": id(messages), "length": 0, "blocks": []}
+        st.session_state.history_cache = cache
+
+    blocks = cache["blocks"]
+    for msg in messages[cache["length"]:]:
+        if isinstance(msg, AIMessage):
+            role = "assistant"
+        elif isinstance(msg, HumanMessage):
+            role = "user"
+        else:
+            continue
+        if blocks and blocks[-1][0] == role:
+            blocks[-1][1].append(msg.content)
+        else:
+            blocks.append((role, [msg.content]))
+    cache["length"] = len(messages)
+    return blocks
+
+# Messages implementation: consecutive messages from the same role are rendered as a single chat block
+for role, contents in get_history_blocks():
+    st.chat_message(role).markdown("\n\n---\n\n".join(contents))
+
+async def invoke_arma(inputs: Any, config: RunnableConfig, prompt: str, tokens: queue.Queue) -> tuple[dict, list]:
+    """
+    Streams the ARMA graph's tokens onto the queue as they are generated, while speculatively
+    preloading the ARM templates the prompt mentions so the template fetch after intent detection is
+    served from the in-process cache. Returns the final state of the thread and the values of any
+    interrupts the run is waiting on.
+
+    This runs on the background event loop; the script thread drains the queue and does the painting.
+    None is put on the queue whenever a new model call starts.
+    """
+    async def stream_tokens() -> None:
+        # durability="exit" saves a checkpoint once, when the run ends, instead of after every superstep
+        async for event in arma.astream_events(inputs, config=config, version="v2", durability="exit"):
+            # internal calls (JSON extraction/validation) are consumed by code, not shown to the user
+            if INTERNAL_LLM_TAG in event.get("tags", []):
+                continue
+            if event["event"] == "on_chat_model_start":
+                tokens.put(None)
+            elif event["event"] == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if content and isinstance(content, str):
+                    tokens.put(content)
+
+    await asyncio.gather(
+        stream_tokens(),
+        asyncio.to_thread(preload_templates, prompt)
+    )
+    return get_latest_state(arma, config), get_pending_interrupts(arma, config)
 
 if prompt := st.chat_input("Enter a message"):
     st.chat_message("user").markdown(prompt)
 
+    # The same message object is kept in the UI history and sent to the graph. Only the new turn is
+    # sent; the add_messages reducer on ARMAState appends it to the checkpointed thread history.
+    human_msg = HumanMessage(content=prompt)
+    st.session_state.messages.append(human_msg)
+
     with st.chat_message("assistant"):
-        msg_placeholder = st.container()
-        st_callback = get_streamlit_cb(st.container())
-
-        # add a thread id to the config
-        config = {"configurable": {"thread_id": st.session_state.thread_id, "user_id": st.session_state.user_id}}
-
-        # invoke the graph
-        response = arma.invoke(
-            {"messages": [HumanMessage(content=prompt)]},
-            config=RunnableConfig(
-                **config,
-                callbacks=[st_callback]
+        # one container holds the response placeholder followed by the agent and tool trace
+        container = st.container()
+        msg_placeholder = container.empty()
+
+        # in batch mode each line is an independent request; they run concurrently, each in its own thread
+        requests = [line.strip() for line in prompt.splitlines() if line.strip()]
+        if st.session_state.get("batch_mode") and len(requests) > 1:
+            with st.spinner(f"Running {len(requests)} requests..."):
+                responses = asyncio.run_coroutine_threadsafe(
+                    abatch_arma(arma, requests, max_concurrency=8),
+                    get_event_loop()
+                ).result()
+            last_msg = "\n\n---\n\n".join(
+                f"**{request}**\n\n" + (
+                    f"Request failed: {response}" if isinstance(response, Exception) else response["messages"][-1].content
+                )
+                for request, response in zip(requests, responses)
+            )
+        else:
+            # the tokens are painted below from the queue, so the callback only renders the agent and tool trace
+            st_callback = get_streamlit_cb(container, stream_tokens=False)
+
+            # add a thread id to the config; it is only generated once the chat sends its first message
+            if "thread_id" not in st.session_state:
+                st.session_state.thread_id = new_thread_id()
+            config = {"configurable": {"thread_id": st.session_state.thread_id, "user_id": st.session_state.user_id}}
+
+            # an interrupted turn (e.g. missing fields) is resumed with the answer instead of starting a new one
+            inputs = turn_input(prompt, resume=st.session_state.pop("awaiting_answer", False))
+
+            # run the graph on the background loop; the agents' Azure SDK calls run in worker threads
+            tokens = queue.Queue()
+            future = asyncio.run_coroutine_threadsafe(
+                invoke_arma(
+                    inputs,
+                    RunnableConfig(
+                        **config,
+                        callbacks=[st_callback],
+                        recursion_limit=app_config.ARMA_RECURSION_LIMIT
+                    ),
+                    prompt,
+                    tokens
+                ),
+                get_event_loop()
             )
-        )
 
-        # get the last message from the response
-        last_msg = response["messages"][-1].content
+            # paint the output of the model that is currently generating until the run completes,
+            # coalescing up to 16 queued tokens into each paint
+            buffer = ""
+            while not (future.done() and tokens.empty()):
+                try:
+                    batch = [tokens.get(timeout=0.05)]
+                except queue.Empty:
+                    continue
+                while len(batch) < 16:
+                    try:
+                        batch.append(tokens.get_nowait())
+                    except queue.Empty:
+                        break
+                for token in batch:
+                    buffer = "" if token is None else buffer + token
+                msg_placeholder.markdown(buffer)
+            response, interrupts = future.result()
+
+            if interrupts:
+                # show the question the graph is waiting on; the next message answers it
+                st.session_state.awaiting_answer = True
+                last_msg = "\n\n".join(str(value) for value in interrupts)
+            else:
+                # get the last message from the response
+                last_msg = response["messages"][-1].content
 
         # Add that last message to the st_message_state
         st.session_state.messages.append(AIMessage(content=last_msg))
 
-        # visually refresh the complete response after the callback container
-        msg_placeholder.write(last_msg)
\ No newline at end of file
+        # replace the streamed tokens with the complete response
+        msg_placeholder.markdown(last_msg)
\ No newline at end of file
@@ -2,7 +2,13 @@
 from langchain_core.messages import convert_to_messages
 
 from typing import Callable, TypeVar
+import asyncio
+import atexit
 import inspect
+import logging
+import logging.handlers
+import queue
+import threading
 
 from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit.delta_generator import DeltaGenerator
@@ -11,7 +17,7 @@ from langchain_core.callbacks.base import BaseCallbackHandler
 from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
 
 # Define a function to wrap and add context to Streamlit's integration with LangGraph
-def get_streamlit_cb(parent_container: DeltaGenerator) -> BaseCallbackHandler:
+def get_streamlit_cb(parent_container: DeltaGenerator, stream_tokens: bool = True) -> BaseCallbackHandler:
     """
     Creates a Streamlit callback handler that integrates fully with any LangChain ChatLLM integration,
     updating the provided Streamlit container with outputs such as tokens, model responses,
@@ -22,6 +28,8 @@ def get_streamlit_cb(parent_container: DeltaGenerator) -> BaseCallbackHandler:
     Args:
         parent_container (DeltaGenerator): The Streamlit container where the text will be rendered
                                            during the LLM interaction.
+        stream_tokens (bool): Whether to paint each new LLM token. Pass False when tokens are displayed
+                              elsewhere, so the graph's event loop does not wait on a paint per token.
     Returns:
         BaseCallbackHandler: An instance of StreamlitCallbackHandler configured for full integration
                              with ChatLLM, enabling dynamic updates in the Streamlit app.
@@ -77,9 +85,55 @@ def get_streamlit_cb(parent_container: DeltaGenerator) -> BaseCallbackHandler:
             setattr(st_cb, method_name,
                     add_streamlit_context(method_func))  # Replace the method with the wrapped version
 
+    # Tokens are displayed by the caller; keep only the agent and tool trace
+    if not stream_tokens:
+        st_cb.on_llm_new_token = lambda *args, **kwargs: None
+
     # Return the fully configured StreamlitCallbackHandler instance, now context-aware and integrated with any ChatLLM
     return st_cb
 
+def start_event_loop(name: str = "arma-event-loop") -> asyncio.AbstractEventLoop:
+    """
+    Starts an event loop that runs forever on a daemon thread. Submit coroutines to it with
+    asyncio.run_coroutine_threadsafe. Keeping one loop for the whole process lets loop-bound resources,
+    such as the LLM clients' pooled HTTP connections, be reused across requests.
+
+    Args:
+        name (str): The name of the loop's thread.
+    Returns:
+        asyncio.AbstractEventLoop: The running loop.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name=name, daemon=True).start()
+    return loop
+
+_log_listener = None
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    Configures application logging once per process. Records are formatted by a QueueHandler on the
+    calling thread and pushed onto an unbounded queue; a QueueListener writes them from its own thread,
+    so log I/O never runs on the caller's thread or event loop. Safe to call on every Streamlit rerun; only the first call has effect.
+
+    Args:
+        level (int): The root logger level.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+
+    log_queue = queue.Queue(-1)
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
 def pretty_print_message(message, indent=False):
     pretty_message = message.pretty_repr(html=True)
     if not indent: